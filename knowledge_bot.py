@@ -25,14 +25,19 @@ if _tns_admin and os.path.isdir(_tns_admin):
         if "already been initialized" not in str(e).lower():
             raise
 
+import array
+import collections
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import streamlit as st
 
-from utils.oracle_db import DatabaseManager
-from utils.oci_embedding import init_client, get_embeddings
-from utils.oci_chat import chat_with_context
+from utils.oracle_db import DatabaseManager, supports_vector_bind
+from utils.oci_embedding import init_client
+from utils.embed_batcher import EmbedBatcher
+from utils.oci_chat import init_chat_client, chat_with_context_stream
+from utils.query_cache import QueryCache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +45,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# One vector-search hit (tuple per row instead of a dict)
+Chunk = collections.namedtuple("Chunk", "job_id chunk_id chunk_text similarity object_name")
+
+# Seconds that document list, job_ids, ingest status and search results may be served from cache.
+# Scheduler-driven pipeline runs never clear these, so this bounds how stale any of them can be.
+PIPELINE_CACHE_TTL = 30
+
+# Cap on RAG context sent to the chat model (chars); lower-ranked chunks beyond it are dropped
+MAX_CONTEXT_CHARS = 8000
+
+# HNSW search-time candidate list size (recall vs latency); see doc_chunks_vec_idx in setup_pipeline.py
+ANN_EF_SEARCH = 80
+# Extra HNSW candidates per requested row; vector_distance() ranks them exactly
+ANN_OVERFETCH = 4
+
 
 def get_db() -> DatabaseManager:
     if "db" not in st.session_state:
@@ -47,6 +67,12 @@ def get_db() -> DatabaseManager:
     return st.session_state.db
 
 
+def get_query_cache() -> QueryCache:
+    if "query_cache" not in st.session_state:
+        st.session_state.query_cache = QueryCache(max_size=512, ttl=PIPELINE_CACHE_TTL)
+    return st.session_state.query_cache
+
+
 def get_oci_client():
     if "oci_client" not in st.session_state:
         import oci
@@ -61,17 +87,37 @@ def get_oci_client():
     )
 
 
-def get_distinct_document_names(db: DatabaseManager) -> List[str]:
-    """Distinct object_name from doc_ingest_jobs that have at least one chunk."""
+def get_oci_chat_client():
+    if "oci_chat_client" not in st.session_state:
+        _, config, _ = get_oci_client()
+        st.session_state.oci_chat_client = init_chat_client(config)
+    return st.session_state.oci_chat_client
+
+
+@st.cache_resource
+def get_embed_batcher(_oci_client, compartment_id: str) -> EmbedBatcher:
+    """One EmbedBatcher per process (shared across sessions) so concurrent queries share OCI calls."""
+    return EmbedBatcher(_oci_client, compartment_id)
+
+
+@st.cache_data(ttl=PIPELINE_CACHE_TTL, show_spinner=False)
+def _cached_doc_names(_db: DatabaseManager) -> List[str]:
     q = """
     SELECT DISTINCT j.object_name
       FROM doc_ingest_jobs j
-     WHERE EXISTS (SELECT 1 FROM doc_chunks c WHERE c.job_id = j.job_id)
+     WHERE j.job_id IN (SELECT /*+ UNNEST */ DISTINCT c.job_id FROM doc_chunks c)
      ORDER BY j.object_name
     """
+    # doc_chunks_pk (job_id, chunk_id) covers the subquery: an index fast full scan
+    # over distinct job_ids instead of a per-job semi-join probe.
+    rows = _db.execute_query(q, fetch_all=True)
+    return [r[0] for r in rows] if rows else []
+
+
+def get_distinct_document_names(db: DatabaseManager) -> List[str]:
+    """Distinct object_name from doc_ingest_jobs that have at least one chunk (cached 30s)."""
     try:
-        rows = db.execute_query(q, fetch_all=True)
-        names = [r[0] for r in rows] if rows else []
+        names = _cached_doc_names(db)
         logger.info("get_distinct_document_names: found %s documents: %s", len(names), names)
         return names
     except Exception as e:
@@ -79,6 +125,28 @@ def get_distinct_document_names(db: DatabaseManager) -> List[str]:
         return []
 
 
+@st.cache_data(ttl=PIPELINE_CACHE_TTL, show_spinner=False)
+def _cached_job_ids(_db: DatabaseManager, doc_name: str) -> List[int]:
+    q = "SELECT job_id FROM doc_ingest_jobs WHERE object_name = :doc_name ORDER BY job_id"
+    rows = _db.execute_query(q, params={"doc_name": doc_name}, fetch_all=True)
+    return [r[0] for r in rows] if rows else []
+
+
+def get_job_ids_for_doc(db: DatabaseManager, doc_name: str) -> List[int]:
+    """job_ids of doc_ingest_jobs for object_name (cached 30s, same as the document list)."""
+    job_ids = _cached_job_ids(db, doc_name)
+    logger.info("get_job_ids_for_doc: doc %r -> job_ids %s", doc_name, job_ids)
+    return job_ids
+
+
+def _job_id_filter(job_ids: List[int]) -> Tuple[str, Dict[str, int]]:
+    """SQL predicate on c.job_id plus bind params (single = or IN list of binds)."""
+    if len(job_ids) == 1:
+        return "c.job_id = :jid0", {"jid0": job_ids[0]}
+    params = {f"jid{i}": jid for i, jid in enumerate(job_ids)}
+    return "c.job_id IN (" + ", ".join(f":{name}" for name in params) + ")", params
+
+
 def search_chunks_by_doc(
     db: DatabaseManager,
     oci_client: Any,
@@ -86,82 +154,107 @@ def search_chunks_by_doc(
     doc_name: str,
     query: str,
     top_k: int = 10,
-) -> List[Dict[str, Any]]:
+) -> List[Chunk]:
     """
     Embed query, then vector search in doc_chunks filtered by object_name.
-    Returns list of dicts with chunk_text, similarity, job_id, chunk_id.
+    Returns list of Chunk(job_id, chunk_id, chunk_text, similarity, object_name).
     """
     logger.info(
         "search_chunks_by_doc: doc_name=%r, query=%r, top_k=%s",
         doc_name, query[:200] + ("..." if len(query) > 200 else ""), top_k,
     )
 
-    # Embed query
+    # Repeated (doc, query, top_k) -> serve from cache, skipping embed + vector search
+    cache = get_query_cache()
+    cache_key = (doc_name, hashlib.blake2b(query.encode(), digest_size=16).hexdigest(), top_k)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.info("search_chunks_by_doc: cache hit (%s rows)", len(cached))
+        return cached
+
+    # Start embedding in the background (EmbedBatcher thread) so the OCI round-trip
+    # overlaps with the job_id lookup / count queries below; cancelled if we bail out
+    # before it is sent (it is still queued for the batch window).
+    embed_future = get_embed_batcher(oci_client, compartment_id).embed_one(query)
+
+    # Resolve object_name -> job_id(s) so the ANN query filters doc_chunks directly (no join)
     try:
-        embeddings = get_embeddings(oci_client, compartment_id, [query])
+        job_ids = get_job_ids_for_doc(db, doc_name)
     except Exception as e:
-        logger.error("search_chunks_by_doc: get_embeddings failed: %s", e, exc_info=True)
+        logger.error("search_chunks_by_doc: job_id lookup failed: %s", e, exc_info=True)
+        embed_future.cancel()
         return []
-    if not embeddings or len(embeddings) != 1:
-        logger.warning(
-            "search_chunks_by_doc: get_embeddings returned %s (expected 1 embedding)",
-            len(embeddings) if embeddings else 0,
-        )
+    if not job_ids:
+        logger.warning("search_chunks_by_doc: no ingest jobs for doc %r", doc_name)
+        embed_future.cancel()
         return []
-    query_embedding = embeddings[0]
-    logger.info("search_chunks_by_doc: embedding ok, dimension=%s", len(query_embedding))
-    embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
-
-    # Optional: log how many chunks exist for this doc (without vector filter)
+    job_filter, job_params = _job_id_filter(job_ids)
+
+    # Optional: log how many chunks exist for this doc (extra round-trip, DEBUG only)
+    if logger.isEnabledFor(logging.DEBUG):
+        try:
+            count_sql = f"""
+            SELECT COUNT(*) FROM doc_chunks c
+            WHERE {job_filter} AND c.embed_vector IS NOT NULL
+            """
+            count_row = db.execute_query(count_sql, params=job_params, fetch_one=True)
+            total_chunks = count_row[0] if count_row else 0
+            logger.debug("search_chunks_by_doc: doc %r has %s chunks with non-null embed_vector", doc_name, total_chunks)
+        except Exception as e:
+            logger.warning("search_chunks_by_doc: count check failed: %s", e)
+
+    # Wait for the query embedding (coalesced with concurrent queries into one OCI call)
     try:
-        count_sql = """
-        SELECT COUNT(*) FROM doc_chunks c
-        JOIN doc_ingest_jobs j ON j.job_id = c.job_id
-        WHERE j.object_name = :doc_name AND c.embed_vector IS NOT NULL
-        """
-        count_row = db.execute_query(count_sql, params={"doc_name": doc_name}, fetch_one=True)
-        total_chunks = count_row[0] if count_row else 0
-        logger.info("search_chunks_by_doc: doc %r has %s chunks with non-null embed_vector", doc_name, total_chunks)
+        query_embedding = embed_future.result()
     except Exception as e:
-        logger.warning("search_chunks_by_doc: count check failed: %s", e)
-
-    # Vector search filtered by document (object_name)
-    sql = """
+        logger.error("search_chunks_by_doc: embedding failed: %s", e, exc_info=True)
+        return []
+    logger.info("search_chunks_by_doc: embedding ok, dimension=%s", len(query_embedding))
+    # Bind as native VECTOR (binary FLOAT32) where the driver allows it; older thick-mode
+    # clients (< 23.4) can only send text, which TO_VECTOR() parses server-side.
+    if supports_vector_bind():
+        query_vector = array.array("f", query_embedding)
+        vector_expr = ":query_vector"
+    else:
+        query_vector = "[" + ",".join(map(str, query_embedding)) + "]"
+        vector_expr = "TO_VECTOR(:query_vector)"
+
+    # Approximate vector search (HNSW index) filtered by the document's job_ids.
+    # Candidates come back with exact cosine distances, so widening EFSEARCH is the
+    # server-side equivalent of over-fetch + rerank without shipping vectors to the client.
+    ef_search = ANN_EF_SEARCH + ANN_OVERFETCH * top_k
+    sql = f"""
     SELECT
         c.job_id,
         c.chunk_id,
-        DBMS_LOB.SUBSTR(c.chunk_text, 8000, 1) AS chunk_text,
-        vector_distance(c.embed_vector, TO_VECTOR(:query_vector), COSINE) AS similarity,
-        j.object_name
+        c.chunk_text,
+        vector_distance(c.embed_vector, {vector_expr}, COSINE) AS similarity
     FROM doc_chunks c
-    JOIN doc_ingest_jobs j ON j.job_id = c.job_id
-    WHERE j.object_name = :doc_name
+    WHERE {job_filter}
       AND c.embed_vector IS NOT NULL
-    ORDER BY similarity
-    FETCH FIRST :top_k ROWS ONLY
+    ORDER BY vector_distance(c.embed_vector, {vector_expr}, COSINE)
+    FETCH APPROX FIRST :top_k ROWS ONLY
+    WITH TARGET ACCURACY PARAMETERS (EFSEARCH {ef_search})
     """
     params = {
-        "query_vector": embedding_str,
-        "doc_name": doc_name,
+        "query_vector": query_vector,
         "top_k": top_k,
+        **job_params,
     }
     try:
-        rows = db.execute_query(sql, params=params, fetch_all=True)
+        rows = db.execute_query(
+            sql, params=params, fetch_all=True, arraysize=top_k, prefetchrows=top_k + 1
+        )
         logger.info("search_chunks_by_doc: vector search returned %s rows", len(rows) if rows else 0)
         if not rows:
             return []
         result = [
-            {
-                "job_id": r[0],
-                "chunk_id": r[1],
-                "chunk_text": r[2] or "",
-                "similarity": float(r[3]) if r[3] is not None else None,
-                "object_name": r[4] or "",
-            }
+            Chunk(r[0], r[1], r[2] or "", float(r[3]) if r[3] is not None else None, doc_name)
             for r in rows
         ]
-        if result and result[0].get("similarity") is not None:
-            logger.info("search_chunks_by_doc: best similarity=%.4f", result[0]["similarity"])
+        if result and result[0].similarity is not None:
+            logger.info("search_chunks_by_doc: best similarity=%.4f", result[0].similarity)
+        cache.set(cache_key, result)
         return result
     except Exception as e:
         logger.error("search_chunks_by_doc: vector search failed: %s", e, exc_info=True)
@@ -196,8 +289,8 @@ def get_scheduler_jobs(db: DatabaseManager) -> List[Dict[str, Any]]:
         return []
 
 
-def get_ingest_job_status(db: DatabaseManager) -> Dict[str, Any]:
-    """Get doc_ingest_jobs status summary and recent jobs."""
+@st.cache_data(ttl=PIPELINE_CACHE_TTL, show_spinner=False)
+def _cached_status(_db: DatabaseManager) -> Dict[str, Any]:
     summary_q = """
     SELECT status, COUNT(*) as cnt
       FROM doc_ingest_jobs
@@ -213,28 +306,41 @@ def get_ingest_job_status(db: DatabaseManager) -> Dict[str, Any]:
      ORDER BY created_at DESC
      FETCH FIRST 20 ROWS ONLY
     """
+    summary_rows = _db.execute_query(summary_q, fetch_all=True)
+    recent_rows = _db.execute_query(recent_q, fetch_all=True)
+    return {
+        "summary": {r[0]: r[1] for r in summary_rows} if summary_rows else {},
+        "recent": [
+            {
+                "job_id": r[0],
+                "object_name": r[1],
+                "status": r[2],
+                "attempts": r[3],
+                "created": r[4],
+                "error": r[5],
+            }
+            for r in recent_rows
+        ] if recent_rows else [],
+    }
+
+
+def get_ingest_job_status(db: DatabaseManager) -> Dict[str, Any]:
+    """Get doc_ingest_jobs status summary and recent jobs (cached 30s)."""
     try:
-        summary_rows = db.execute_query(summary_q, fetch_all=True)
-        recent_rows = db.execute_query(recent_q, fetch_all=True)
-        return {
-            "summary": {r[0]: r[1] for r in summary_rows} if summary_rows else {},
-            "recent": [
-                {
-                    "job_id": r[0],
-                    "object_name": r[1],
-                    "status": r[2],
-                    "attempts": r[3],
-                    "created": r[4],
-                    "error": r[5],
-                }
-                for r in recent_rows
-            ] if recent_rows else [],
-        }
+        return _cached_status(db)
     except Exception as e:
         logger.error("get_ingest_job_status failed: %s", e)
         return {"summary": {}, "recent": []}
 
 
+def clear_pipeline_caches():
+    """Drop cached document list, job_ids, ingest status and search results after pipeline actions."""
+    _cached_doc_names.clear()
+    _cached_job_ids.clear()
+    _cached_status.clear()
+    get_query_cache().clear()
+
+
 def toggle_scheduler_job(db: DatabaseManager, job_name: str, enable: bool) -> bool:
     """Enable or disable a scheduler job."""
     if enable:
@@ -262,6 +368,48 @@ def run_procedure(db: DatabaseManager, proc_name: str) -> bool:
         return False
 
 
+def build_context(chunks: List[Chunk], max_chars: int = MAX_CONTEXT_CHARS) -> Tuple[str, List[Chunk]]:
+    """
+    Join chunk texts (best first) until max_chars; the first chunk is always kept, cut if needed.
+    Returns (context, used) where used are the chunks actually sent, with a cut first chunk's
+    chunk_text shortened to what the model saw.
+    """
+    used: List[Chunk] = []
+    n = 0
+    for c in chunks:
+        t = c.chunk_text
+        if n + len(t) > max_chars:
+            if not used:
+                used.append(c._replace(chunk_text=t[:max_chars]))
+            logger.info(
+                "build_context: truncated to %s of %s chunks (max_chars=%s)",
+                len(used), len(chunks), max_chars,
+            )
+            break
+        used.append(c)
+        n += len(t) + 2
+    return "\n\n".join(c.chunk_text for c in used), used
+
+
+def render_chunks(chunks: List[Chunk], max_chars: Optional[int] = None):
+    """Render each chunk as a property table + code block (text cut at max_chars if given)."""
+    for i, c in enumerate(chunks, 1):
+        st.markdown(
+            "---\n"
+            f"### 📌 Chunk {i}\n"
+            "| Property | Value |\n"
+            "|----------|-------|\n"
+            f"| **File** | `{c.object_name or 'N/A'}` |\n"
+            f"| **Similarity** | `{c.similarity:.4f}` |\n"
+            f"| **Job ID** | {c.job_id} |\n"
+            f"| **Chunk ID** | {c.chunk_id} |\n"
+        )
+        text = c.chunk_text
+        if max_chars is not None and len(text) > max_chars:
+            text = text[:max_chars] + "..."
+        st.code(text, language=None)
+
+
 def render_knowledge_bot_tab(db: DatabaseManager):
     """Render the Knowledge Bot tab."""
     try:
@@ -310,18 +458,7 @@ def render_knowledge_bot_tab(db: DatabaseManager):
                 st.info("No chunks found for this document/query.")
             else:
                 st.subheader(f"📄 Top {len(chunks)} Similar Chunks")
-                for i, c in enumerate(chunks, 1):
-                    st.markdown(f"""
----
-### 📌 Chunk {i}
-| Property | Value |
-|----------|-------|
-| **File** | `{c.get('object_name', 'N/A')}` |
-| **Similarity** | `{c['similarity']:.4f}` |
-| **Job ID** | {c['job_id']} |
-| **Chunk ID** | {c['chunk_id']} |
-""")
-                    st.code(c["chunk_text"], language=None)
+                render_chunks(chunks)
 
     if ask_rag:
         if not query.strip():
@@ -329,7 +466,8 @@ def render_knowledge_bot_tab(db: DatabaseManager):
         else:
             with st.spinner("Searching chunks and generating answer..."):
                 try:
-                    oci_client, oci_config, compartment_id = get_oci_client()
+                    oci_client, _, compartment_id = get_oci_client()
+                    chat_client = get_oci_chat_client()
                     chunks = search_chunks_by_doc(
                         db, oci_client, compartment_id, selected_doc, query.strip(), top_k=top_k
                     )
@@ -339,32 +477,34 @@ def render_knowledge_bot_tab(db: DatabaseManager):
             if not chunks:
                 st.info("No chunks found. Cannot generate an answer.")
             else:
-                context = "\n\n".join(c["chunk_text"] for c in chunks)
-                answer = chat_with_context(
-                    oci_config,
-                    compartment_id,
-                    context=context,
-                    question=query.strip(),
-                )
-                if answer:
-                    st.subheader("Answer")
-                    st.write(answer)
-                    st.divider()
-                    st.subheader("📄 Source Chunks")
-                    for i, c in enumerate(chunks, 1):
-                        st.markdown(f"""
----
-### 📌 Chunk {i}
-| Property | Value |
-|----------|-------|
-| **File** | `{c.get('object_name', 'N/A')}` |
-| **Similarity** | `{c['similarity']:.4f}` |
-| **Job ID** | {c['job_id']} |
-| **Chunk ID** | {c['chunk_id']} |
-""")
-                        st.code(c["chunk_text"][:1000] + ("..." if len(c["chunk_text"]) > 1000 else ""), language=None)
+                context, used_chunks = build_context(chunks)
+                st.subheader("Answer")
+                # Render tokens as they arrive instead of waiting for the full reply
+                try:
+                    answer = st.write_stream(
+                        chat_with_context_stream(
+                            chat_client,
+                            compartment_id,
+                            context=context,
+                            question=query.strip(),
+                        )
+                    )
+                except Exception as e:
+                    st.error(f"Answer generation failed; the text above may be incomplete: {e}")
                 else:
-                    st.error("Failed to get answer from LLM.")
+                    if answer:
+                        st.divider()
+                        st.subheader("📄 Source Chunks")
+                        first_cut = used_chunks[0] is not chunks[0]
+                        if first_cut or len(used_chunks) < len(chunks):
+                            note = f" (chunk 1 cut to {len(used_chunks[0].chunk_text)} chars)" if first_cut else ""
+                            st.caption(
+                                f"Context limited to {MAX_CONTEXT_CHARS} chars: "
+                                f"{len(used_chunks)} of {len(chunks)} chunks were sent to the model{note}."
+                            )
+                        render_chunks(used_chunks, max_chars=1000)
+                    else:
+                        st.error("Failed to get answer from LLM.")
 
 
 def render_admin_tab(db: DatabaseManager):
@@ -373,6 +513,7 @@ def render_admin_tab(db: DatabaseManager):
     
     # Refresh button
     if st.button("🔄 Refresh", key="refresh_admin"):
+        clear_pipeline_caches()
         st.rerun()
     
     # Scheduler Jobs Section
@@ -398,11 +539,13 @@ def render_admin_tab(db: DatabaseManager):
                 if job["enabled"]:
                     if st.button("⏸️ Disable", key=f"disable_{job['job_name']}"):
                         if toggle_scheduler_job(db, job["job_name"], False):
+                            clear_pipeline_caches()
                             st.success(f"Disabled {job['job_name']}")
                             st.rerun()
                 else:
                     if st.button("▶️ Enable", key=f"enable_{job['job_name']}"):
                         if toggle_scheduler_job(db, job["job_name"], True):
+                            clear_pipeline_caches()
                             st.success(f"Enabled {job['job_name']}")
                             st.rerun()
             
@@ -419,18 +562,21 @@ def render_admin_tab(db: DatabaseManager):
         if st.button("📥 Run Poller", help="poll_object_storage_to_jobs"):
             with st.spinner("Running poller..."):
                 if run_procedure(db, "poll_object_storage_to_jobs"):
+                    clear_pipeline_caches()
                     st.success("Poller completed!")
                     st.rerun()
     with col2:
         if st.button("📄 Run Chunk Worker", help="chunk_worker"):
             with st.spinner("Running chunk worker..."):
                 if run_procedure(db, "chunk_worker"):
+                    clear_pipeline_caches()
                     st.success("Chunk worker completed!")
                     st.rerun()
     with col3:
         if st.button("🧠 Run Embed Worker", help="embed_worker"):
             with st.spinner("Running embed worker..."):
                 if run_procedure(db, "embed_worker"):
+                    clear_pipeline_caches()
                     st.success("Embed worker completed!")
                     st.rerun()
     
@@ -123,6 +123,11 @@ SQL_CREATE_INDEXES_3 = """
 CREATE UNIQUE INDEX doc_ingest_jobs_u1 ON doc_ingest_jobs(bucket_name, object_name, etag)
 """
 
+# Knowledge bot looks up jobs by object_name alone (u1 leads with bucket_name)
+SQL_CREATE_INDEXES_4 = """
+CREATE INDEX doc_ingest_jobs_i2 ON doc_ingest_jobs(object_name, job_id)
+"""
+
 
 def get_sql_poll_procedure():
     """Generate poll_object_storage_to_jobs procedure."""
@@ -343,6 +348,7 @@ BEGIN
     EXECUTE IMMEDIATE q'[
       CREATE VECTOR INDEX doc_chunks_vec_idx ON doc_chunks (embed_vector)
       ORGANIZATION INMEMORY NEIGHBOR GRAPH DISTANCE COSINE WITH TARGET ACCURACY 95
+      PARAMETERS (TYPE HNSW, NEIGHBORS 32, EFCONSTRUCTION 200)
     ]';
   END IF;
 END;
@@ -611,6 +617,7 @@ def create_tables(conn):
         ("obj_manifest_i1", SQL_CREATE_INDEXES),
         ("doc_ingest_jobs_i1", SQL_CREATE_INDEXES_2),
         ("doc_ingest_jobs_u1", SQL_CREATE_INDEXES_3),
+        ("doc_ingest_jobs_i2", SQL_CREATE_INDEXES_4),
     ]
     
     for name, sql in indexes:
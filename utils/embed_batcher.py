@@ -0,0 +1,85 @@
+"""
+Micro-batching for OCI Cohere query embeddings.
+EmbedBatcher(client, compartment_id).embed_one(text) -> Future[List[float]].
+
+Requests arriving within a short window (default 20ms) are coalesced into a single
+get_embeddings() call (one OCI round-trip), up to 96 inputs (Cohere per-call limit).
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Tuple
+
+from utils.oci_embedding import get_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Cohere embed accepts at most 96 inputs per call
+MAX_BATCH_SIZE = 96
+DEFAULT_WINDOW_SEC = 0.02
+
+
+class EmbedBatcher:
+    """Background thread that drains a queue of texts and embeds them in batches."""
+
+    def __init__(
+        self,
+        client: Any,
+        compartment_id: str,
+        model_id: Optional[str] = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        window_sec: float = DEFAULT_WINDOW_SEC,
+    ):
+        self.client = client
+        self.compartment_id = compartment_id
+        self.model_id = model_id
+        self.max_batch_size = max_batch_size
+        self.window_sec = window_sec
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def embed_one(self, text: str) -> Future:
+        """Queue one text; the Future resolves to its embedding vector."""
+        fut: Future = Future()
+        self._queue.put((text, fut))
+        return fut
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window_sec
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Future]]):
+        # Drop futures cancelled while queued; the rest are marked running (no longer cancellable)
+        batch = [(text, fut) for text, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for text, _ in batch]
+        try:
+            embeddings = get_embeddings(self.client, self.compartment_id, texts, model_id=self.model_id)
+            if not embeddings or len(embeddings) != len(texts):
+                raise RuntimeError(
+                    f"get_embeddings returned {len(embeddings) if embeddings else 0} embeddings "
+                    f"(expected {len(texts)})"
+                )
+        except Exception as e:
+            logger.error("EmbedBatcher: batch of %s failed: %s", len(texts), e)
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        logger.info("EmbedBatcher: embedded batch of %s", len(texts))
+        for (_, fut), emb in zip(batch, embeddings):
+            fut.set_result(emb)
@@ -4,65 +4,88 @@ Uses us-chicago-1 for Generative AI Inference by default (override via OCI_REGIO
 """
 
 import os
+import json
 import logging
-from typing import Optional
+from typing import Any, Iterator, Optional
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_OCI_REGION = "us-chicago-1"
+DEFAULT_CHAT_MODEL = "cohere.command-r-08-2024"  # or try: meta.llama-3.1-70b-instruct
 
+# Static parts of the RAG prompt; only context and question vary per call
+_PROMPT_HEAD = "Based on the following context from our documents:\n\n"
+_PROMPT_TAIL = (
+    "Instructions:\n"
+    "1. Answer in one short paragraph based only on the context.\n"
+    "2. If the context does not contain the answer, say so.\n"
+    "3. IMPORTANT: Respond in the SAME LANGUAGE as the question. "
+    "If the question is in Korean, answer in Korean. If in Japanese, answer in Japanese. Etc."
+)
 
-def chat_with_context(
-    config: dict,
+
+def init_chat_client(config: dict) -> Any:
+    """Initialize OCI Generative AI Inference client for chat (us-chicago-1 by default)."""
+    from oci.generative_ai_inference import GenerativeAiInferenceClient
+    region = os.getenv("OCI_REGION", DEFAULT_OCI_REGION)
+    client_config = {**config, "region": region}
+    return GenerativeAiInferenceClient(client_config)
+
+
+def _build_chat_details(
     compartment_id: str,
     context: str,
     question: str,
-    model_id: str = "cohere.command-r-08-2024",  # or try: meta.llama-3.1-70b-instruct
-    max_tokens: int = 1024,
-    temperature: float = 0.3,
-) -> Optional[str]:
-    """
-    Call OCI Cohere chat with context + question (RAG-style).
-    Returns the model reply text or None on error.
-    """
-    import oci
-    from oci.generative_ai_inference import GenerativeAiInferenceClient
+    model_id: str,
+    max_tokens: int,
+    temperature: float,
+    is_stream: bool = False,
+) -> Any:
+    """Build ChatDetails for a RAG prompt (context + question)."""
     from oci.generative_ai_inference.models import (
         ChatDetails,
         CohereChatRequest,
         OnDemandServingMode,
     )
 
-    prompt = (
-        "Based on the following context from our documents:\n\n"
-        f"{context}\n\n"
-        f"Question: {question}\n\n"
-        "Instructions:\n"
-        "1. Answer in one short paragraph based only on the context.\n"
-        "2. If the context does not contain the answer, say so.\n"
-        "3. IMPORTANT: Respond in the SAME LANGUAGE as the question. "
-        "If the question is in Korean, answer in Korean. If in Japanese, answer in Japanese. Etc."
+    prompt = f"{_PROMPT_HEAD}{context}\n\nQuestion: {question}\n\n{_PROMPT_TAIL}"
+
+    serving_mode = OnDemandServingMode(
+        serving_type="ON_DEMAND",
+        model_id=model_id,
     )
+    chat_request = CohereChatRequest(
+        api_format="COHERE",
+        message=prompt,
+        chat_history=[],
+        max_tokens=max_tokens,
+        temperature=temperature,
+        is_stream=is_stream,
+    )
+    return ChatDetails(
+        compartment_id=compartment_id,
+        serving_mode=serving_mode,
+        chat_request=chat_request,
+    )
+
 
+def chat_with_context(
+    client: Any,
+    compartment_id: str,
+    context: str,
+    question: str,
+    model_id: str = DEFAULT_CHAT_MODEL,
+    max_tokens: int = 1024,
+    temperature: float = 0.3,
+) -> Optional[str]:
+    """
+    Call OCI Cohere chat with context + question (RAG-style).
+    client: from init_chat_client(config); reuse it across calls.
+    Returns the model reply text or None on error.
+    """
     try:
-        region = os.getenv("OCI_REGION", DEFAULT_OCI_REGION)
-        client_config = {**config, "region": region}
-        client = GenerativeAiInferenceClient(client_config)
-        serving_mode = OnDemandServingMode(
-            serving_type="ON_DEMAND",
-            model_id=model_id,
-        )
-        chat_request = CohereChatRequest(
-            api_format="COHERE",
-            message=prompt,
-            chat_history=[],
-            max_tokens=max_tokens,
-            temperature=temperature,
-        )
-        details = ChatDetails(
-            compartment_id=compartment_id,
-            serving_mode=serving_mode,
-            chat_request=chat_request,
+        details = _build_chat_details(
+            compartment_id, context, question, model_id, max_tokens, temperature
         )
         response = client.chat(details)
         # Extract text from response (structure may vary by SDK version)
@@ -85,3 +108,35 @@ def chat_with_context(
     except Exception as e:
         logger.error("OCI chat failed: %s", e)
         return None
+
+
+def chat_with_context_stream(
+    client: Any,
+    compartment_id: str,
+    context: str,
+    question: str,
+    model_id: str = DEFAULT_CHAT_MODEL,
+    max_tokens: int = 1024,
+    temperature: float = 0.3,
+) -> Iterator[str]:
+    """
+    Same as chat_with_context but with is_stream=True: yields text pieces as they arrive
+    (for st.write_stream). Errors are logged and re-raised, so a stream cut off partway
+    is not mistaken for a complete answer.
+    """
+    try:
+        details = _build_chat_details(
+            compartment_id, context, question, model_id, max_tokens, temperature, is_stream=True
+        )
+        response = client.chat(details)
+        for event in response.data.events():
+            data = json.loads(event.data)
+            # Final event repeats the whole answer alongside finishReason; skip it
+            if "finishReason" in data:
+                break
+            text = data.get("text")
+            if text:
+                yield text
+    except Exception as e:
+        logger.error("OCI chat stream failed: %s", e)
+        raise
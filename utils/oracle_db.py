@@ -36,6 +36,30 @@ def _load_env():
     _env_loaded = True
 
 
+def _lob_output_type_handler(cursor, metadata):
+    """Fetch CLOB/BLOB columns as str/bytes directly (no LOB locators or DBMS_LOB.SUBSTR)."""
+    import oracledb
+
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if metadata.type_code is oracledb.DB_TYPE_BLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+    return None
+
+
+def supports_vector_bind() -> bool:
+    """
+    True if a VECTOR can be bound natively (array.array). Thin mode always can; thick mode
+    needs Oracle Client 23.4+ (older Instant Clients raise DPI-1050), so callers should fall
+    back to a text bind + TO_VECTOR() when this is False.
+    """
+    import oracledb
+
+    if oracledb.is_thin_mode():
+        return True
+    return oracledb.clientversion()[:2] >= (23, 4)
+
+
 def _get_pool():
     global _pool
     if _pool is not None:
@@ -66,8 +90,14 @@ def _get_pool():
         user=user,
         password=password,
         dsn=dsn,
-        min=1,
-        max=4,
+        min=2,
+        max=max(8, os.cpu_count() or 4),
+        increment=1,
+        # Queue for a free session (up to wait_timeout ms) instead of failing with DPY-4005
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=5000,
+        ping_interval=60,
+        stmtcachesize=40,
     )
     return _pool
 
@@ -85,12 +115,23 @@ class DatabaseManager:
         fetch_one: bool = False,
         fetch_all: bool = True,
         commit: bool = False,
+        arraysize: Optional[int] = None,
+        prefetchrows: Optional[int] = None,
     ) -> Any:
-        """Execute a query. Returns one row, list of rows, or None."""
+        """
+        Execute a query. Returns one row, list of rows, or None.
+        arraysize/prefetchrows: set to the expected row count (e.g. top_k, top_k + 1)
+        so small result sets come back in a single round-trip.
+        """
         conn = self._pool.acquire()
+        conn.outputtypehandler = _lob_output_type_handler
         cursor = None
         try:
             cursor = conn.cursor()
+            if arraysize is not None:
+                cursor.arraysize = arraysize
+            if prefetchrows is not None:
+                cursor.prefetchrows = prefetchrows
             cursor.execute(query, params or {})
             if commit:
                 conn.commit()